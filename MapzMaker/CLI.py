@@ -1,23 +1,46 @@
 #!/usr/bin/env python3
-from ansicolor import blue, red, black
+"""
+mapzmaker command line interface.
+
+Keep imports at module level to a minimum: Every subcommand
+imports only the modules it uses, so --help and lightweight commands
+like highlight-states start fast.
+"""
 import sys
 import os
-import glob
 import os.path
-import concurrent.futures
 
 def perform_render(parser, args):
     from .ShapefileRecords import RecordSet
     from .NaturalEarth import read_naturalearth_zip
     from .MapRenderer import render_all_states
-    # Download natural earth data if not present
-    check_download_all()
-
+    from .Variants import RenderVariant, read_variants
+    from .Projections import check_projection
+    import concurrent.futures
+    import numpy as np
     svgdir = os.path.join(args.directory, "SVG")
     if not args.all and not args.country:
         print("Use either --all or specify at least one country")
         parser.print_help()
         sys.exit(1)
+    stylemap = {
+        "fill": args.fill,
+        "stroke": args.stroke,
+        "stroke_width": args.stroke_width
+    }
+    # Command line options are the defaults for every variant
+    variants = [RenderVariant(None, stylemap, args.proj, args.area_filter)]
+    # Check variants & projections before downloading or rendering anything
+    try:
+        if args.variants:
+            variants = read_variants(args.variants, variants[0])
+        for proj in set(variant.proj for variant in variants):
+            check_projection(proj)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    # Download natural earth data if not present
+    check_download_all()
     os.makedirs(svgdir, exist_ok=True)
     # Read data
     countries = RecordSet(read_naturalearth_zip("ne_10m_admin_0_countries.zip"))
@@ -26,22 +49,18 @@ def perform_render(parser, args):
 
     pool = concurrent.futures.ProcessPoolExecutor(args.parallel)
     futures = []
-
-    stylemap = {
-        "fill": args.fill,
-        "stroke": args.stroke,
-        "stroke_width": args.stroke_width
-    }
+    dtype = np.float32 if args.float32 else np.float64
 
     if args.all:
         # Render all types of structures
-        futures += render_all_states(pool, countries, states, svgdir, stylemap, area_filter_ppm=args.area_filter)
+        futures += render_all_states(pool, countries, states, svgdir, variants=variants, dtype=dtype)
     else:
-        futures += render_all_states(pool, countries, states, svgdir, stylemap, only=args.country, area_filter_ppm=args.area_filter)
+        futures += render_all_states(pool, countries, states, svgdir, only=args.country, variants=variants, dtype=dtype)
     concurrent.futures.wait(futures)
 
 def perform_rasterize(parser, args):
     from .Rasterizer import rasterize_svg
+    import concurrent.futures
     # Check args
     if not args.all and not args.country:
         print("Use either --all or specify at least one country")
@@ -60,8 +79,8 @@ def perform_rasterize(parser, args):
     pngdir = os.path.join(args.directory, "PNG.{}".format(width))
     for dirpath, subdirs, filenames in os.walk(svgdir):
         relpath = os.path.relpath(dirpath, svgdir)
-        # Check country filter
-        country = os.path.split(relpath)[0]
+        # Check country filter (relpath is [variant/]country/type)
+        country = os.path.basename(os.path.dirname(relpath))
         if not args.all and country not in args.country:
             continue
         for filename in filenames:
@@ -89,14 +108,17 @@ def check_download_all():
 
 def perform_highlight(parser, args):
     from .SVGRestyle import highlight_svg
-    svgglob = os.path.join(args.directory, "SVG", args.country, "Country", "*.states.svg")
+    import glob
+    svgglob = os.path.join(args.directory, "SVG", args.variant or "", args.country, "Country", "*.states.svg")
     svgglob_result = glob.glob(svgglob)
     if not svgglob_result:
-        raise ValueError("Can't find SVG file '{}'".format(svgglob))
+        print("Can't find SVG file '{}' (run render first)".format(svgglob))
+        sys.exit(1)
     highlight_svg(svgglob_result[0], args.outfile, args.coldefs)
 
 def download_all(files):
     from .Download import download_file
+    from ansicolor import blue
     urlprefix = "http://www.naturalearthdata.com/http//www.naturalearthdata.com/download/10m/cultural/"
     print(blue("Downloading Natural Earth files...", bold=True))
     for file in files:
@@ -117,6 +139,9 @@ def mapzmaker_cli():
     render.add_argument('-s', '--stroke', default="none", help='HTML stroke color code for SVG')
     render.add_argument('-w', '--stroke-width', default="1", help='Stroke width for the outline')
     render.add_argument('--area-filter', type=float, default=5000., help='Minimum PPM of the total area a subshape has to have in order to be included')
+    render.add_argument('--proj', default="merc", help='Projection to render in: A name like "robin" or a PROJ string like "+proj=stere +lat_0=90"')
+    render.add_argument('--float32', action="store_true", help='Store coordinates as float32 to reduce per-worker memory usage')
+    render.add_argument('--variants', help='JSON file with a list of variants to render from a single geometry load. Each variant is rendered to its own subdirectory')
     render.set_defaults(func=perform_render)
     # Render
     render = subparsers.add_parser("rasterize")
@@ -129,6 +154,7 @@ def mapzmaker_cli():
     highlight.add_argument('country', help='The country (ISO 3166 alpha 2 code, e.g. "DE", "US") to highlight from. Auto-selects the correct SVG file')
     highlight.add_argument('outfile', help='Output SVG file')
     highlight.add_argument('-c', '--color',  nargs='+', dest="coldefs", help='[state:color] - Highlight a state with a SVG color. State is automatically slugified')
+    highlight.add_argument('--variant', help='Name of the render variant to highlight from')
     highlight.set_defaults(func=perform_highlight)
 
     args = parser.parse_args()
@@ -1,36 +1,38 @@
 #!/usr/bin/env python3
-from collections import namedtuple
-import concurrent.futures
-from toolz import dicttoolz, itertoolz, functoolz
+from toolz import dicttoolz
 from slugify import slugify
-import pyproj
 import svgwrite
-import functools
 import os.path
 import sys
 import traceback
 import numpy as np
-from UliEngineering.Math.Geometry import *
-from UliEngineering.Math.Coordinates import *
-from UliEngineering.Utils.NumPy import *
-from UliEngineering.SignalProcessing.Selection import multiselect
-
-from .ShapeTransform import *
-from .Projections import *
-from .ShapefileRecords import *
-from .NaturalEarth import *
-
-def shape_to_polys(shape, ref_bbox=None, filter_area_thresh=.001, proj="merc"):
-    points = np.asarray(shape.points.copy())
-    # Mirror by X axis
-    # as lower latitude represent more southern coords (in contrast to SVG)
-    points[:,1] *= -1
-    points = project_array(points, dstp=proj)
+from UliEngineering.Math.Coordinates import BoundingBox
+
+from .ShapeTransform import shape_coordinates, mirrored_bbox, transform_coordinates_svg, filter_shapes_by_total_area_threshold
+from .Projections import project_inplace, check_projection
+from .NaturalEarth import states_by_country, countries_by_isoa2
+from .Variants import RenderVariant, group_variants, variant_directory
+
+def shape_to_polys(shape, ref_bbox=None, filter_area_thresh=.001, proj="merc", dtype=np.float64):
+    """
+    Project, normalize & area-filter a shape.
+    Only two float64 scratch arrays (x, y) are used for the projection,
+    the result is written into a single (n,2) array of the given dtype
+    (use np.float32 to halve memory usage), which the returned
+    polygons are views of.
+    """
+    x, y = shape_coordinates(shape)
+    project_inplace(x, y, dstp=proj)
     # Compute reference bounding box if not using external reference
+    # (of the coordinates mirrored by the X axis, see below)
     if ref_bbox is None:
-        ref_bbox = BoundingBox(points)
-    # Various coordinate normalization
-    normalize_coordinates_svg(points, bbox=ref_bbox)
+        ref_bbox = mirrored_bbox(x, y)
+    # Mirror by X axis
+    # as lower latitude represent more southern coords (in contrast to SVG),
+    # then normalize & scale, all in one go
+    points = transform_coordinates_svg(x, y, ref_bbox,
+        out=np.empty((x.shape[0], 2), dtype=dtype))
+    del x, y
     # Find only polygons that are larger than a certain fraction
     # of the total area (i.e. remove tiny islands)
     polys = filter_shapes_by_total_area_threshold(points, shape.parts[1:], filter_area_thresh)
@@ -41,12 +43,16 @@ def _set_viewbox(dwg, polys):
     Set the viewbox from polygons
     """
     # Compute bbox only from remaining points
-    bbox = BoundingBox(np.vstack(polys))
+    # (per polygon to avoid stacking them into a new array)
+    bbox = BoundingBox(np.asarray(
+        [np.min(poly, axis=0) for poly in polys] +
+        [np.max(poly, axis=0) for poly in polys]))
     # Set SVG viewbox to bounding box
     dwg.viewbox(bbox.minx, bbox.miny, bbox.width, bbox.height)
 
 def __draw_to_svg(dwg, poly, name, stylemap, objtype):
-    dwg.add(svgwrite.shapes.Polygon(poly,
+    # svgwrite only accepts Python numbers (not e.g. np.float32) as coordinates
+    dwg.add(svgwrite.shapes.Polygon(poly.tolist(),
         class_="{}-{}".format(objtype, slugify(name)),
         **stylemap))
 
@@ -70,19 +76,30 @@ def draw_country_state_map(dwg, name, country_polys, state_polymap, stylemap1, s
 
 
 
-def _render_single(name, shape, outname, stylemap, objtype="country", proj="merc", area_filter_ppm=5000):
+def _render_single(name, shape, outname, stylemap, objtype="country", proj="merc", area_filter_ppm=5000, dtype=np.float64):
+    return _render_single_variants(name, shape, [(outname, stylemap)],
+        objtype=objtype, proj=proj, area_filter_ppm=area_filter_ppm, dtype=dtype)
+
+def _render_single_variants(name, shape, targets, objtype="country", proj="merc", area_filter_ppm=5000, dtype=np.float64):
+    """
+    Render a single shape to multiple SVGs that only differ in style.
+    The shape is only projected & filtered once.
+
+    targets is a list of (outname, stylemap) tuples.
+    """
     try:
-        # Create directory
-        os.makedirs(os.path.dirname(outname), exist_ok=True)
-        # Create SVG
-        dwg = svgwrite.Drawing(outname, profile='full')
         # Preprocess shape
-        polys, _ = shape_to_polys(shape, proj=proj, filter_area_thresh=area_filter_ppm / 1e6)
-        # Render & save
-        draw_single_map(dwg, name, polys, stylemap, objtype=objtype)
-        dwg.save()
-        # Log
-        print("Rendered {} to {}".format(name, outname))
+        polys, _ = shape_to_polys(shape, proj=proj, filter_area_thresh=area_filter_ppm / 1e6, dtype=dtype)
+        for outname, stylemap in targets:
+            # Create directory
+            os.makedirs(os.path.dirname(outname), exist_ok=True)
+            # Create SVG
+            dwg = svgwrite.Drawing(outname, profile='full')
+            # Render & save
+            draw_single_map(dwg, name, polys, stylemap, objtype=objtype)
+            dwg.save()
+            # Log
+            print("Rendered {} to {}".format(name, outname))
         return True
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -90,24 +107,36 @@ def _render_single(name, shape, outname, stylemap, objtype="country", proj="merc
         traceback.print_tb(exc_traceback)
         return False
 
-def _render_state_overlay(name, country_shape, subshape_map, outname, stylemap, proj="merc", area_filter_ppm=5000):
+def _render_state_overlay(name, country_shape, subshape_map, outname, stylemap, proj="merc", area_filter_ppm=5000, dtype=np.float64):
+    return _render_state_overlay_variants(name, country_shape, subshape_map,
+        [(outname, stylemap)], proj=proj, dtype=dtype)
+
+def _render_state_overlay_variants(name, country_shape, subshape_map, targets, proj="merc", dtype=np.float64):
+    """
+    Render a country with state overlay to multiple SVGs
+    that only differ in style.
+    The shapes are only projected & filtered once.
+
+    targets is a list of (outname, stylemap) tuples.
+    """
     try:
-        # Create directory
-        os.makedirs(os.path.dirname(outname), exist_ok=True)
-        # Create SVG
-        dwg = svgwrite.Drawing(outname, profile='full')
         # Preprocess shapes
-        country_polys, bbox = shape_to_polys(country_shape, proj=proj)
+        country_polys, bbox = shape_to_polys(country_shape, proj=proj, dtype=dtype)
         subpolymap = dicttoolz.valmap(
                 lambda shape: shape_to_polys(
-                    shape, proj=proj, ref_bbox=bbox)[0], subshape_map)
-        # Render & save
-        draw_country_state_map(dwg, name, country_polys, subpolymap, stylemap)
-        # Set viewbox
-        _set_viewbox(dwg, country_polys)
-        dwg.save()
-        # Log
-        print("Rendered state overlay for {} to {}".format(name, outname))
+                    shape, proj=proj, ref_bbox=bbox, dtype=dtype)[0], subshape_map)
+        for outname, stylemap in targets:
+            # Create directory
+            os.makedirs(os.path.dirname(outname), exist_ok=True)
+            # Create SVG
+            dwg = svgwrite.Drawing(outname, profile='full')
+            # Render & save
+            draw_country_state_map(dwg, name, country_polys, subpolymap, stylemap)
+            # Set viewbox
+            _set_viewbox(dwg, country_polys)
+            dwg.save()
+            # Log
+            print("Rendered state overlay for {} to {}".format(name, outname))
         return True
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -115,10 +144,39 @@ def _render_state_overlay(name, country_shape, subshape_map, outname, stylemap,
         traceback.print_tb(exc_traceback)
         return False
 
-def render_all_states(pool, countries, states, directory, stylemap, only=[], area_filter_ppm=5000):
+def _variant_targets(variants, directory, *relpath):
+    """
+    Build the (outname, stylemap) list for a group of variants
+    """
+    return [(os.path.join(variant_directory(directory, variant), *relpath), variant.stylemap)
+            for variant in variants]
+
+def render_all_states(pool, countries, states, directory, stylemap=None, only=[], area_filter_ppm=5000, variants=None, dtype=np.float64):
     """
     Render states
+
+    Either stylemap or variants (a list of RenderVariants) must be given.
+    stylemap and area_filter_ppm are only used without variants
+    (rendering a single, unnamed merc variant). With variants, every
+    variant carries its own style, projection and area filter instead.
+    Every shape is projected & filtered once for every distinct
+    (projection, area filter) combination and then serialized once
+    for every variant.
+
+    dtype is the coordinate dtype used in the workers.
+    Use np.float32 to reduce memory usage.
     """
+    if variants is None:
+        if stylemap is None:
+            raise ValueError("Either stylemap or variants must be given")
+        variants = [RenderVariant(None, stylemap, "merc", area_filter_ppm)]
+    # Fail once instead of in every task
+    for proj in set(variant.proj for variant in variants):
+        check_projection(proj)
+    # Variants sharing the same geometry
+    single_groups = group_variants(variants, ("proj", "area_filter_ppm"))
+    # The state overlay does not use the area filter
+    overlay_groups = group_variants(variants, ("proj",))
     # Build state map
     states_by_isoa2 = states_by_country(states)
     country_by_isoa2 = countries_by_isoa2(countries)
@@ -136,8 +194,10 @@ def render_all_states(pool, countries, states, directory, stylemap, only=[], are
         try: countryname = country.name_long
         except: pass
         countryshape = countries.reader.shape(country.index)
-        outname = os.path.join(directory, isoa2, "Country", countryname + ".svg")
-        futures.append(pool.submit(_render_single, countryname, countryshape, outname, stylemap, "country"))
+        for (proj, area_filter), group in single_groups.items():
+            targets = _variant_targets(group, directory, isoa2, "Country", countryname + ".svg")
+            futures.append(pool.submit(_render_single_variants, countryname, countryshape,
+                targets, "country", proj=proj, area_filter_ppm=area_filter, dtype=dtype))
         # Get states
         if isoa2 not in states_by_isoa2:
             continue
@@ -153,16 +213,18 @@ def render_all_states(pool, countries, states, directory, stylemap, only=[], are
                 continue
             # Add to statemap for later combined rendering
             statemap[statename] = stateshape
-            # Build outname & create directory
-            outname = os.path.join(directory, isoa2, "States", statename + ".svg")
             # Render state asynchronously
-            futures.append(pool.submit(_render_single, statename, stateshape, outname, stylemap, "state"))
+            for (proj, area_filter), group in single_groups.items():
+                targets = _variant_targets(group, directory, isoa2, "States", statename + ".svg")
+                futures.append(pool.submit(_render_single_variants, statename, stateshape,
+                    targets, "state", proj=proj, area_filter_ppm=area_filter, dtype=dtype))
         #
         # Render country with state overlay
         #
-        outname = os.path.join(directory, isoa2, "Country", countryname + ".states.svg")
-        futures.append(pool.submit(_render_state_overlay,
-            countryname, countryshape, statemap, outname, stylemap))
+        for (proj,), group in overlay_groups.items():
+            targets = _variant_targets(group, directory, isoa2, "Country", countryname + ".states.svg")
+            futures.append(pool.submit(_render_state_overlay_variants,
+                countryname, countryshape, statemap, targets, proj=proj, dtype=dtype))
     return futures
 
 def render_country(countries, directory, name):
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import shapefile
-from UliEngineering.Utils.Files import *
-from UliEngineering.Utils.ZIP import *
+from UliEngineering.Utils.Files import find_datasets_by_extension
+from UliEngineering.Utils.ZIP import list_zip, read_from_zip
 from toolz import itertoolz
 import operator
 
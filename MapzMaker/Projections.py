@@ -1,14 +1,51 @@
 #!/usr/bin/env python3
+import functools
 import pyproj
 import numpy as np
 
+def _proj(proj):
+    """
+    Build a projection from either a name (e.g. "merc")
+    or a PROJ string (e.g. "+proj=stere +lat_0=90")
+    """
+    if proj.startswith("+"):
+        return pyproj.Proj(proj, datum='WGS84')
+    return pyproj.Proj(proj=proj, datum='WGS84')
+
+@functools.lru_cache(maxsize=None)
+def _transformer(srcp, dstp):
+    """
+    Build (and cache) a transformer from projection srcp to projection dstp
+    """
+    p1 = _proj(srcp)
+    p2 = _proj(dstp)
+    return pyproj.Transformer.from_proj(p1, p2, always_xy=True)
+
+def check_projection(proj, srcp='latlong'):
+    """
+    Raise a ValueError if coordinates in projection srcp
+    can't be projected to proj (e.g. unknown projection name
+    or missing required parameters)
+    """
+    try:
+        _transformer(srcp, proj)
+    except pyproj.exceptions.ProjError as e:
+        raise ValueError("Invalid projection '{}': {}".format(proj, e))
+
 def project_array(coordinates, srcp='latlong', dstp='wintri'):
     """
     Project a numpy (n,2) array in projection srcp to projection dstp
     Returns a numpy (n,2) array.
     """
-    p1 = pyproj.Proj(proj=srcp, datum='WGS84')
-    p2 = pyproj.Proj(proj=dstp, datum='WGS84')
-    fx, fy = pyproj.transform(p1, p2, coordinates[:,0], coordinates[:,1])
+    fx, fy = _transformer(srcp, dstp).transform(coordinates[:,0], coordinates[:,1])
     # Re-create (n,2) coordinates
-    return np.dstack([fx, fy])[0]
\ No newline at end of file
+    return np.dstack([fx, fy])[0]
+
+def project_inplace(x, y, srcp='latlong', dstp='wintri'):
+    """
+    Project coordinates in projection srcp to projection dstp,
+    overwriting x and y.
+    x and y must be contiguous float64 numpy arrays.
+    """
+    _transformer(srcp, dstp).transform(x, y, inplace=True)
+    return x, y
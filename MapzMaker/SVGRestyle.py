@@ -3,8 +3,6 @@
 Routines to highlight specific elements of a SVG
 """
 from bs4 import BeautifulSoup
-import numpy as np
-from UliEngineering.Math.Coordinates import *
 from slugify import slugify
 
 def soup_from_svg(filename):
@@ -16,6 +14,7 @@ def soup_to_svg(soup, filename):
         outfile.write(soup.prettify("utf-8"))
 
 def parse_poly(attr):
+    import numpy as np
     return np.asarray([[float(s2) for s2 in s.split(",")] for s in attr.split(" ")])
 
 def parse_attrmap(attrdefs):
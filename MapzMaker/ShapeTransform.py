@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
-from UliEngineering.SignalProcessing.Selection import multiselect
-from UliEngineering.Utils.NumPy import *
-from UliEngineering.Math.Geometry import *
-from UliEngineering.Math.Coordinates import *
-from scipy.spatial.distance import euclidean
+from UliEngineering.Utils.NumPy import ngrams, split_by_pivot
+from UliEngineering.Math.Geometry import polygon_area
+from UliEngineering.Math.Coordinates import BoundingBox
 import numpy as np
+import operator
 
 def filter_shapes_by_total_area_threshold(points, pivots, threshold=.005):
     """
@@ -22,7 +21,8 @@ def filter_shapes_by_total_area_threshold(points, pivots, threshold=.005):
     # Find areas below the threshold
     idxs = np.where(partareas > threshold * total_area)[0]
     # Select from parts list
-    return multiselect(parts, idxs)
+    # (not using UliEngineering's multiselect, which imports scipy)
+    return [parts[idx] for idx in idxs]
 
 
 def node_pairwise_distance(poly):
@@ -32,7 +32,7 @@ def node_pairwise_distance(poly):
     """
     dist = np.zeros(poly.shape[0])
     for i, ngram in enumerate(ngrams(poly, 2, closed=True)):
-        dist[i] = euclidean(ngram[0], ngram[1])
+        dist[i] = np.hypot(*(ngram[1] - ngram[0]))
     return dist
 
 def compute_merge_direction(poly):
@@ -179,6 +179,42 @@ def normalize_coordinates_svg(points, bbox):
     # due to the projection mechanics of pyproj
     points *= 100. / bbox.max_dim
 
+def shape_coordinates(shape):
+    """
+    Read the points of a shapefile shape into
+    two contiguous float64 arrays (x, y),
+    without an intermediary (n,2) array.
+    """
+    npoints = len(shape.points)
+    x = np.fromiter(map(operator.itemgetter(0), shape.points), np.float64, npoints)
+    y = np.fromiter(map(operator.itemgetter(1), shape.points), np.float64, npoints)
+    return x, y
+
+def mirrored_bbox(x, y):
+    """
+    Compute the bounding box of the given coordinates
+    after mirroring them by the X axis.
+    """
+    return BoundingBox(np.asarray([[np.min(x), -np.max(y)],
+                                   [np.max(x), -np.min(y)]]))
+
+def transform_coordinates_svg(x, y, bbox, out):
+    """
+    Mirror coordinates by the X axis, then normalize them
+    like normalize_coordinates_svg(), writing the result to
+    the (n,2) array out (which may be float32).
+    Uses bbox (of the mirrored coordinates) as reference bounding box.
+    x and y are used as scratch space.
+    """
+    scale = 100. / bbox.max_dim
+    # x' = (x - minx) * scale
+    np.subtract(x, bbox.minx, out=x)
+    np.multiply(x, scale, out=out[:,0], casting="same_kind")
+    # y' = (-y - miny) * scale = (y + miny) * -scale
+    np.add(y, bbox.miny, out=y)
+    np.multiply(y, -scale, out=out[:,1], casting="same_kind")
+    return out
+
 def simplify(poly, ppm=1.):
     """
     Parameters
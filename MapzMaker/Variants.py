@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Render variants: Multiple styles, projections or area filters
+rendered from a single geometry load.
+"""
+import json
+import os.path
+from collections import namedtuple, OrderedDict
+
+RenderVariant = namedtuple("RenderVariant", ["name", "stylemap", "proj", "area_filter_ppm"])
+
+# Keys allowed in a variants file
+variant_keys = ("name", "fill", "stroke", "stroke_width", "proj", "area_filter")
+
+def variant_from_dict(variantdef, default):
+    """
+    Build a RenderVariant from a dict (e.g. from a variants file).
+    Any key not present is taken from the default variant.
+    """
+    stylemap = dict(default.stylemap)
+    for key in ("fill", "stroke", "stroke_width"):
+        if key in variantdef:
+            stylemap[key] = str(variantdef[key])
+    return RenderVariant(
+        variantdef.get("name", default.name),
+        stylemap,
+        variantdef.get("proj", default.proj),
+        float(variantdef.get("area_filter", default.area_filter_ppm)))
+
+def _check_variantdef(variantdef, filename):
+    """
+    Raise a ValueError if variantdef is not a valid variant definition
+    """
+    if not isinstance(variantdef, dict):
+        raise ValueError("Variants file '{}' contains a non-object variant: {!r}".format(
+            filename, variantdef))
+    unknown_keys = sorted(set(variantdef) - set(variant_keys))
+    if unknown_keys:
+        raise ValueError("Variants file '{}': unknown key(s) {} (allowed: {})".format(
+            filename, ", ".join(map(repr, unknown_keys)), ", ".join(variant_keys)))
+    if "name" in variantdef:
+        name = variantdef["name"]
+        if (not isinstance(name, str) or not name or name in (".", "..")
+                or os.path.basename(name) != name
+                or (os.path.altsep and os.path.altsep in name)):
+            raise ValueError("Variants file '{}' contains an invalid variant name: {!r}".format(
+                filename, name))
+    for key in ("fill", "stroke", "stroke_width", "proj", "area_filter"):
+        if key in variantdef and variantdef[key] is None:
+            raise ValueError("Variants file '{}': '{}' must not be null".format(filename, key))
+
+def read_variants(filename, default):
+    """
+    Read a JSON variants file, i.e. a list of objects like
+    {"name": "outline", "fill": "none", "stroke": "#000", "proj": "robin"}.
+    Keys: name, fill, stroke, stroke_width, proj, area_filter.
+
+    Returns
+    -------
+    A list of RenderVariants
+    """
+    with open(filename) as infile:
+        variantdefs = json.load(infile)
+    if not isinstance(variantdefs, list) or not variantdefs:
+        raise ValueError("Variants file '{}' must contain a non-empty list".format(filename))
+    for variantdef in variantdefs:
+        _check_variantdef(variantdef, filename)
+    variants = [variant_from_dict(variantdef, default) for variantdef in variantdefs]
+    # Every variant is rendered to its own subdirectory
+    names = [variant.name for variant in variants]
+    if len(variants) > 1 and not all(names):
+        raise ValueError("Variants file '{}': Every variant needs a name if more than one variant is given".format(filename))
+    if len(set(names)) != len(names):
+        raise ValueError("Variants file '{}': Variant names must be unique".format(filename))
+    return variants
+
+def group_variants(variants, fields=("proj", "area_filter_ppm")):
+    """
+    Group variants that share the same geometry, i.e. only differ
+    in the fields not given in fields (usually just their style).
+
+    Returns
+    -------
+    An ordered map of field value tuple to list of variants
+    """
+    groups = OrderedDict()
+    for variant in variants:
+        key = tuple(getattr(variant, field) for field in fields)
+        groups.setdefault(key, []).append(variant)
+    return groups
+
+def variant_directory(directory, variant):
+    """
+    The output directory for a variant.
+    Unnamed variants are rendered directly to directory
+    """
+    if not variant.name:
+        return directory
+    return os.path.join(directory, variant.name)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure the cold-start time of every mapzmaker subcommand.
+
+Every measurement runs the real mapzmaker entry point in a fresh interpreter.
+For each subcommand, "help" is the time for "mapzmaker <command> --help"
+(argument parsing only) and "startup" is the time for running the command
+with a no-op input: It performs all the imports of the command,
+but exits before doing any actual work.
+The "mapzmaker" row measures "mapzmaker --help" and "mapzmaker" without arguments.
+
+Usage: benchmarks/startup.py [-n 10] [--budget 250]
+"""
+import argparse
+import os.path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+repodir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arguments & expected exit code for each command that make it exit
+# right after its imports (no countries or no input SVG)
+noop_args = {
+    "mapzmaker": ([], 0),
+    "render": (["render"], 1),
+    "rasterize": (["rasterize"], 1),
+    "highlight-states": (["highlight-states", "XX", os.devnull], 1),
+}
+
+def time_subprocess(cmd, n, returncode=0):
+    """
+    Run cmd n times, returning the median wall clock time in ms
+    or None if cmd did not exit with the given returncode
+    or printed a traceback
+    """
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        result = subprocess.run(cmd, cwd=repodir, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+        times.append((time.perf_counter() - start) * 1000.)
+        if result.returncode != returncode or "Traceback" in result.stderr:
+            return None
+    return statistics.median(times)
+
+def benchmark_command(command, directory, n):
+    mapzmaker = [sys.executable, os.path.join(repodir, "mapzmaker"), "-d", directory]
+    args, returncode = noop_args[command]
+    help_args = [] if command == "mapzmaker" else [command]
+    help_time = time_subprocess(mapzmaker + help_args + ["--help"], n)
+    startup_time = time_subprocess(mapzmaker + args, n, returncode)
+    return help_time, startup_time
+
+def format_time(ms):
+    return "failed" if ms is None else "{:.1f}".format(ms)
+
+def over_budget(ms, budget):
+    return ms is None or (budget is not None and ms > budget)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--runs', type=int, default=10, help='Number of runs per measurement')
+    parser.add_argument('--budget', type=float, help='Fail if the median help or startup time of any command exceeds [budget] ms')
+    args = parser.parse_args()
+
+    baseline = format_time(time_subprocess([sys.executable, "-c", "pass"], args.runs))
+    print("{:<20} {:>12} {:>12}".format("command", "help [ms]", "startup [ms]"))
+    print("{:<20} {:>12} {:>12}".format("(python)", baseline, baseline))
+    failed = []
+    # Empty directory: Commands won't find any input
+    with tempfile.TemporaryDirectory() as directory:
+        for command in noop_args:
+            help_time, startup_time = benchmark_command(command, directory, args.runs)
+            print("{:<20} {:>12} {:>12}".format(
+                command, format_time(help_time), format_time(startup_time)))
+            if over_budget(help_time, args.budget):
+                failed.append(command + " --help")
+            if over_budget(startup_time, args.budget):
+                failed.append(command)
+    if failed:
+        if args.budget is None:
+            print("Failed: {}".format(", ".join(failed)))
+        else:
+            print("Failed or over budget ({} ms): {}".format(args.budget, ", ".join(failed)))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
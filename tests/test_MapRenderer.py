@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os.path
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from UliEngineering.Math.Coordinates import BoundingBox
+from MapzMaker.MapRenderer import shape_to_polys, _render_single, render_all_states
+from MapzMaker.Variants import RenderVariant
+from MapzMaker.ShapeTransform import normalize_coordinates_svg, filter_shapes_by_total_area_threshold
+from MapzMaker.Projections import project_array
+
+class SyntheticShape(object):
+    """
+    Mimics a pyshp shape: Two rings (roughly Germany & an island) in lon/lat
+    """
+    def __init__(self):
+        angles = np.linspace(0, 2 * np.pi, 300)
+        mainland = np.c_[10.5 + 4.5 * np.cos(angles), 51 + 4 * np.sin(angles)]
+        angles = np.linspace(0, 2 * np.pi, 50)
+        island = np.c_[14 + .5 * np.cos(angles), 54.5 + .5 * np.sin(angles)]
+        self.points = [tuple(p) for p in np.vstack([mainland, island])]
+        self.parts = [0, 300]
+
+def _old_shape_to_polys(shape, filter_area_thresh, proj):
+    """
+    The original pipeline: mirror, project, then normalize
+    """
+    points = np.asarray(shape.points.copy())
+    points[:,1] *= -1
+    points = project_array(points, dstp=proj)
+    ref_bbox = BoundingBox(points)
+    normalize_coordinates_svg(points, bbox=ref_bbox)
+    return filter_shapes_by_total_area_threshold(points, shape.parts[1:], filter_area_thresh)
+
+def test_shape_to_polys_matches_original_pipeline():
+    shape = SyntheticShape()
+    for proj in ("merc", "robin"):
+        polys, _ = shape_to_polys(shape, filter_area_thresh=.001, proj=proj)
+        expected = _old_shape_to_polys(shape, .001, proj)
+        assert len(polys) == len(expected) == 2
+        for poly, expected_poly in zip(polys, expected):
+            assert_allclose(poly, expected_poly, rtol=0, atol=1e-9)
+
+def test_shape_to_polys_float32():
+    shape = SyntheticShape()
+    polys64, _ = shape_to_polys(shape)
+    polys32, _ = shape_to_polys(shape, dtype=np.float32)
+    for poly64, poly32 in zip(polys64, polys32):
+        assert poly32.dtype == np.float32
+        assert_allclose(poly32, poly64, atol=1e-4)
+
+def test_render_single_float32(tmp_path):
+    outname = str(tmp_path / "DE" / "Country" / "Germany.svg")
+    stylemap = {"fill": "#000", "stroke": "none", "stroke_width": "1"}
+    assert _render_single("Germany", SyntheticShape(), outname, stylemap, dtype=np.float32)
+    assert os.path.isfile(outname)
+    with open(outname) as infile:
+        assert infile.read().count("<polygon") == 2
+
+class TriangleShape(object):
+    """
+    A north-south asymmetric shape: Wide in the south, pointy in the north
+    """
+    def __init__(self):
+        self.points = [(6., 47.), (10.5, 55.), (15., 47.), (6., 47.)]
+        self.parts = [0]
+
+@pytest.mark.parametrize("proj", ["merc", "+proj=stere +lat_0=90", "+proj=ortho +lat_0=50 +lon_0=10"])
+def test_shape_to_polys_north_up(proj):
+    # SVG y increases downwards, so the northern apex must be at the top
+    poly = shape_to_polys(TriangleShape(), proj=proj)[0][0]
+    assert np.argmin(poly[:,1]) == 1
+    # ... and the wide southern base at the bottom
+    assert poly[0,1] > poly[1,1] + 50
+    assert poly[2,1] > poly[1,1] + 50
+
+@pytest.mark.parametrize("proj", ["robinson", "lcc"])
+def test_render_all_states_invalid_projection(proj):
+    stylemap = {"fill": "#000", "stroke": "none", "stroke_width": "1"}
+    variants = [RenderVariant("a", stylemap, "merc", 5000.),
+                RenderVariant("b", stylemap, proj, 5000.)]
+    # Must fail before using the pool or any data
+    with pytest.raises(ValueError, match="Invalid projection"):
+        render_all_states(None, None, None, "output", variants=variants)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import json
+import pytest
+from MapzMaker.Variants import RenderVariant, read_variants, group_variants
+
+default = RenderVariant(None, {"fill": "#000", "stroke": "none", "stroke_width": "1"}, "merc", 5000.)
+
+def _read(tmp_path, variantdefs):
+    filename = str(tmp_path / "variants.json")
+    with open(filename, "w") as outfile:
+        json.dump(variantdefs, outfile)
+    return read_variants(filename, default)
+
+def test_read_variants(tmp_path):
+    variants = _read(tmp_path, [{"name": "black"},
+                                {"name": "robin", "fill": "#f00", "proj": "robin"}])
+    assert variants[0] == RenderVariant("black", default.stylemap, "merc", 5000.)
+    assert variants[1].stylemap["fill"] == "#f00"
+    assert list(group_variants(variants)) == [("merc", 5000.), ("robin", 5000.)]
+
+@pytest.mark.parametrize("variantdefs", [
+    [], {"name": "a"}, ["b"], [{"name": ".."}], [{"name": "."}], [{"name": "a/b"}],
+    [{"name": 1}], [{"name": ""}], [{"stroke_width": None}],
+    [{"name": "a"}, {"fill": "#f00"}], [{"name": "a"}, {"name": "a"}],
+    [{"stroke-width": "0.2"}], [{"area_filter_ppm": 10}], [{"projection": "robin"}],
+])
+def test_read_variants_invalid(tmp_path, variantdefs):
+    with pytest.raises(ValueError, match="Variants file"):
+        _read(tmp_path, variantdefs)